@@ -11,9 +11,12 @@ This script:
 
 from __future__ import annotations
 
+import ast
+import logging
+import operator
 import sqlite3
-import traceback
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
 
 import gradio as gr
 from dotenv import load_dotenv
@@ -64,19 +67,201 @@ initial_ticket_prices: Dict[str, float] = {
 with sqlite3.connect(DB) as conn:
     cursor = conn.cursor()
 
+    # Use write-ahead logging with relaxed syncing to avoid an fsync per commit,
+    # and keep temporary data and reads in memory where possible
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=67108864")
+
     # Create table for ticket prices
     cursor.execute(
         "CREATE TABLE IF NOT EXISTS prices (city TEXT PRIMARY KEY, price REAL)"
     )
 
-    # Insert initial rows but ignore duplicates
-    for city, price in initial_ticket_prices.items():
-        cursor.execute(
+    # Only populate the table on first run; later starts skip the writes entirely
+    cursor.execute("SELECT COUNT(*) FROM prices")
+    (row_count,) = cursor.fetchone()
+
+    if row_count == 0:
+        # Insert initial rows in one batched statement, ignoring duplicates
+        cursor.executemany(
             "INSERT OR IGNORE INTO prices (city, price) VALUES (?, ?)",
-            (city, price),
+            initial_ticket_prices.items(),
         )
+        conn.commit()
 
-    conn.commit()
+    # Load the static price table once so tool calls are served from memory
+    cursor.execute("SELECT city, price FROM prices")
+    PRICE_CACHE: Dict[str, float] = dict(cursor.fetchall())
+
+
+# ------------------------------------------------------------
+# 🧮 Restricted Arithmetic Evaluator
+# ------------------------------------------------------------
+
+# Largest exponent accepted by the calculator tool
+MAX_EXPONENT: int = 1000
+
+# Largest integer result (in bits) that `**` and `*` may produce
+MAX_RESULT_BITS: int = 4096
+
+
+def bounded_pow(base: int | float, exponent: int | float) -> int | float:
+    """
+    Raise `base` to `exponent`, rejecting results that are huge or non-real.
+
+    Without this guard, an expression such as "9**9**9" would tie up the
+    process computing an integer with hundreds of millions of digits.
+
+    Parameters
+    ----------
+    base : int or float
+        Number to raise.
+    exponent : int or float
+        Power to raise `base` to.
+
+    Returns
+    -------
+    int or float
+        Real-valued result of the exponentiation.
+
+    Raises
+    ------
+    ValueError
+        If the exponent or the integer result would be too large, or the
+        result is complex (e.g. a fractional power of a negative number).
+    """
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponent exceeds {MAX_EXPONENT}")
+
+    # Integer powers grow by roughly bit_length bits per unit of exponent
+    if (
+        isinstance(base, int)
+        and isinstance(exponent, int)
+        and base.bit_length() * exponent > MAX_RESULT_BITS
+    ):
+        raise ValueError(f"Result exceeds {MAX_RESULT_BITS} bits")
+
+    result = operator.pow(base, exponent)
+
+    if isinstance(result, complex):
+        raise ValueError("Result is not a real number")
+
+    return result
+
+
+def bounded_mul(left: int | float, right: int | float) -> int | float:
+    """
+    Multiply two numbers, rejecting integer products that would be huge.
+
+    Parameters
+    ----------
+    left : int or float
+        Left-hand operand.
+    right : int or float
+        Right-hand operand.
+
+    Returns
+    -------
+    int or float
+        Product of the operands.
+
+    Raises
+    ------
+    ValueError
+        If the integer product would exceed `MAX_RESULT_BITS` bits.
+    """
+    # The bit length of an integer product is at most the sum of the operands'
+    if (
+        isinstance(left, int)
+        and isinstance(right, int)
+        and left.bit_length() + right.bit_length() > MAX_RESULT_BITS
+    ):
+        raise ValueError(f"Result exceeds {MAX_RESULT_BITS} bits")
+
+    return operator.mul(left, right)
+
+
+# Supported binary operators for the calculator tool
+BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: bounded_mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: bounded_pow,
+}
+
+# Supported unary operators for the calculator tool
+UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+@lru_cache(maxsize=256)
+def parse_expression(expr: str) -> ast.Expression:
+    """
+    Parse an arithmetic expression once and cache the resulting AST.
+
+    Parameters
+    ----------
+    expr : str
+        Numeric expression such as "799 * 0.9".
+
+    Returns
+    -------
+    ast.Expression
+        Parsed expression tree, reused for repeated identical expressions.
+    """
+    return ast.parse(expr, mode="eval")
+
+
+def evaluate_node(node: ast.AST) -> int | float:
+    """
+    Recursively evaluate a restricted arithmetic AST node.
+
+    Only numeric constants and the operators listed in `BINARY_OPERATORS`
+    and `UNARY_OPERATORS` are permitted.
+
+    Parameters
+    ----------
+    node : ast.AST
+        Node of a parsed expression tree.
+
+    Returns
+    -------
+    int or float
+        Numeric value of the node.
+
+    Raises
+    ------
+    ValueError
+        If the node contains anything other than plain arithmetic, or an
+        exponentiation or product would be too large or non-real.
+    """
+    if isinstance(node, ast.Expression):
+        return evaluate_node(node.body)
+
+    # Numeric literals only (bool is a subclass of int, so exclude it explicitly)
+    if (
+        isinstance(node, ast.Constant)
+        and isinstance(node.value, (int, float))
+        and not isinstance(node.value, bool)
+    ):
+        return node.value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        return BINARY_OPERATORS[type(node.op)](
+            evaluate_node(node.left), evaluate_node(node.right)
+        )
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](evaluate_node(node.operand))
+
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
 
 
 # ------------------------------------------------------------
@@ -100,26 +285,15 @@ def get_ticket_price(city: str) -> str:
 
     Notes
     -----
-    A parameterised query is used to prevent SQL injection.
+    Prices are looked up in `PRICE_CACHE`, which is loaded once from the
+    SQLite table at import time.
     """
     print(f"TOOL CALLED: Getting price for {city}", flush=True)
 
-    try:
-        # Convert city name to lowercase for consistency
-        city_normalised = city.lower()
-
-        with sqlite3.connect(DB) as conn:
-            cursor = conn.cursor()
-
-            # Parameterised SQL query ensures safety
-            cursor.execute("SELECT price FROM prices WHERE city = ?", (city_normalised,))
-            result = cursor.fetchone()
-
-            return f"${result[0]}" if result else "Not found"
+    # Convert city name to lowercase for consistency
+    price = PRICE_CACHE.get(city.lower())
 
-    except Exception:
-        # Capture full traceback for debugging
-        return f"Error: {traceback.format_exc()}"
+    return f"${price}" if price is not None else "Not found"
 
 
 @function_tool
@@ -130,27 +304,43 @@ def calculate(expr: str) -> str:
     Parameters
     ----------
     expr : str
-        Python-compatible numeric expression to evaluate.
+        Arithmetic expression using numbers and `+ - * / // % **`.
 
     Returns
     -------
     str
         Evaluation result converted to string.
 
-    Warning
-    -------
-    `eval()` is potentially unsafe. Only trusted expressions should be allowed.
+    Notes
+    -----
+    Expressions are evaluated by a restricted AST walker rather than `eval()`,
+    so arbitrary Python code cannot be executed.
     """
     print(f"TOOL CALLED: Calculating {expr}", flush=True)
     try:
-        # NOTE: eval is inherently risky, but acceptable here because it is tool-restricted.
-        return str(eval(expr))
-    except Exception:
-        return f"Error: {traceback.format_exc()}"
+        # Parse (cached per expression string) and evaluate the arithmetic tree
+        return str(evaluate_node(parse_expression(expr)))
+    except (SyntaxError, ValueError, ArithmeticError, RecursionError, MemoryError):
+        # Keep the traceback in the logs and return a short message to the agent
+        logging.exception("calculate tool failed for %r", expr)
+        return "Error: unable to evaluate expression"
 
 
 # ------------------------------------------------------------
-# 🤖 Chat Function (Agent Execution)
+# 🤖 FlightAI Agent
+# ------------------------------------------------------------
+
+# FlightAI agent configured with tools, built once and reused for every turn
+AGENT: Agent = Agent(
+    name="FlightAI",
+    instructions=instructions,
+    model=MODEL,
+    tools=[get_ticket_price, calculate],
+)
+
+
+# ------------------------------------------------------------
+# 💬 Chat Function (Agent Execution)
 # ------------------------------------------------------------
 
 async def chat(message: str, history: List[Dict[str, str]]) -> str:
@@ -169,20 +359,15 @@ async def chat(message: str, history: List[Dict[str, str]]) -> str:
     str
         Final content output from the agent.
     """
-    # Convert history into messages suitable for the Agent API
-    messages = [{"role": m["role"], "content": m["content"]} for m in history]
-    messages.append({"role": "user", "content": message})
-
-    # Create FlightAI agent configured with tools
-    agent = Agent(
-        name="FlightAI",
-        instructions=instructions,
-        model=MODEL,
-        tools=[get_ticket_price, calculate],
-    )
-
-    # Run the agent with the message list
-    result = await Runner.run(agent, messages)
+    # Reduce history to `role`/`content` (Gradio may add `metadata`/`options` keys)
+    # and append the new user turn in the same pass
+    messages = [
+        *({"role": m["role"], "content": m["content"]} for m in history),
+        {"role": "user", "content": message},
+    ]
+
+    # Run the shared agent with the message list
+    result = await Runner.run(AGENT, messages)
 
     # Return the final text output
     return result.final_output
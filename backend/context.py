@@ -52,6 +52,11 @@ For each vulnerability found (from both semgrep and your own analysis), provide:
 Be thorough and practical in your analysis. Don't duplicate issues between semgrep results and your own findings.
 """
 
+# Constant instruction prepended to every piece of code submitted for analysis
+ANALYSIS_PROMPT_HEADER: Final[str] = (
+    "Please analyze the following Python code for security vulnerabilities:\n\n"
+)
+
 
 def get_analysis_prompt(code: str) -> str:
     """
@@ -70,11 +75,8 @@ def get_analysis_prompt(code: str) -> str:
     str
         A formatted prompt string suitable for passing to the agent.
     """
-    # Prefix the code with a clear instruction for the agent
-    return (
-        "Please analyze the following Python code for security vulnerabilities:\n\n"
-        f"{code}"
-    )
+    # Prefix the code with the precomputed instruction header
+    return ANALYSIS_PROMPT_HEADER + code
 
 
 def enhance_summary(code_length: int, agent_summary: str) -> str:
@@ -98,4 +100,4 @@ def enhance_summary(code_length: int, agent_summary: str) -> str:
         An enriched summary string including basic context.
     """
     # Add a short contextual prefix before the agent's own summary
-    return f"Analyzed {code_length} characters of Python code. {agent_summary}"
+    return "Analyzed " + str(code_length) + " characters of Python code. " + agent_summary
@@ -154,6 +154,18 @@ resource "google_cloud_run_service" "app" {
         ports {
           container_port = 8000
         }
+
+        # Restart the instance if /health reports the Semgrep MCP server as down
+        liveness_probe {
+          initial_delay_seconds = 60
+          period_seconds        = 30
+          timeout_seconds       = 10
+          failure_threshold     = 3
+
+          http_get {
+            path = "/health"
+          }
+        }
       }
     }
 